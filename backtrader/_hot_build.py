@@ -0,0 +1,25 @@
+"""ahead of time compilation of the numeric kernels into the backtrader._bt_hot extension module
+
+jitted kernels are compiled on their first call in every new process (numba cache aside), which stalls
+the first backtest of a parameter sweep; the extension module is loaded compiled instead, and the
+analyzers fall back to the numba / numpy kernels when it is not built
+
+requires numba, build in place (or before building the wheel) with:
+    python -m backtrader._hot_build
+"""
+
+import os
+from numba.pycc import CC
+
+from backtrader.analyzer_store.trade_analyzer import _mfe_mae_loop, _mfe_mae_batch_loop
+
+cc = CC("_bt_hot")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# mfe_mae(highs, lows, open_price, is_long) -> (max floating profit, max floating loss)
+cc.export("mfe_mae", "UniTuple(f8, 2)(f8[:], f8[:], f8, b1)")(_mfe_mae_loop)
+# mfe_mae_batch(highs, lows, starts, ends, open_prices, is_long) -> (max floating profits, max floating losses)
+cc.export("mfe_mae_batch", "UniTuple(f8[:], 2)(f8[:], f8[:], i8[:], i8[:], f8[:], b1[:])")(_mfe_mae_batch_loop)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,51 +1,118 @@
 """position analyzer, to store the time series information of """
 
 from typing import Dict
+import numpy as np
 import backtrader as bt
 import pandas as pd
+from backtrader.utils.npdates import num2datetime64
 
 
 class PerformanceAnalyzer(bt.Analyzer):
 
     def __init__(self):
-        self.position = dict()
-        self.value = dict()
+        # column-wise float64 storage, one column per instrument, cash is stored as "MNYFUND" (last column)
+        self._names = [d._name for d in self.strategy.datas] + ["MNYFUND"]
+        self._n = 0  # number of bars stored
+        self._dt = np.empty(0, dtype=np.float64)
+        self._pos = np.empty((0, len(self._names)), dtype=np.float64)
+        self._val = np.empty((0, len(self._names)), dtype=np.float64)
+
+        # bind the per-bar lookups once, next() is called on every bar
+        self._dt0 = self.datas[0].datetime
+        self._get_pos = self.strategy.getposition
+        self._get_cash = self.strategy.broker.get_cash
+        self._datas = list(self.strategy.datas)
+        self._closes = [d.close for d in self.strategy.datas]
+
+    def start(self):
+        # preloaded feeds already know their length, otherwise the buffers grow in next()
+        self._resize(max([d.buflen() for d in self._datas] + [1]))
+        # the data feeds are detached from the analyzers returned by optimizations (optreturn)
+        self._tz = self.datas[0]._tz
+
+    def stop(self):
+        # release the feeds and the broker, the analyzers returned by optimizations are pickled (optreturn)
+        self._dt0 = self._get_pos = self._get_cash = None
+        self._datas, self._closes = [], []
+        self._resize(self._n)
+
+    def _resize(self, nbars: int):
+        """resize the storage buffers to hold nbars bars"""
+        self._dt = np.resize(self._dt, nbars)
+        self._pos = np.resize(self._pos, (nbars, len(self._names)))
+        self._val = np.resize(self._val, (nbars, len(self._names)))
 
     def next(self):
+        # one row per timestamp: when datas[0] has not moved (another feed has a bar it misses),
+        # the last row is overwritten, so the latest values of a timestamp are kept
+        dt = self._dt0[0]
+        i = self._n
+        if i and self._dt[i - 1] == dt:
+            i -= 1
+        else:
+            if i == len(self._dt):
+                self._resize(2 * i)
+            self._n = i + 1
 
-        # iterate through all the items
-        dt = self.datas[0].datetime.datetime(0).strftime("%Y-%m-%d %H:%M:%S")
-        position = {dt: dict()}
-        value = {dt: dict()}
+            # store the raw float datetime, converted to timestamps in get_analysis()
+            self._dt[i] = dt
 
-        for item in self.strategy.datas:
-            position_item = self.strategy.getpositionbyname(item._name)
-            position[dt].update({item._name: position_item.size})
-            value[dt].update({item._name: position_item.size * item.close[0]})
+        # iterate through all the items
+        get_pos = self._get_pos
+        pos, val = self._pos[i], self._val[i]
+        pos[:-1] = [get_pos(item).size for item in self._datas]
+        val[:-1] = [close[0] for close in self._closes]
+        val[:-1] *= pos[:-1]
 
         # get cash seperately
-        position[dt].update({"MNYFUND": self.strategy.broker.get_cash()})
-        value[dt].update({"MNYFUND": self.strategy.broker.get_cash()})
-
-        self.position.update(position)
-        self.value.update(value)
+        pos[-1] = val[-1] = self._get_cash()
 
     def get_analysis(self) -> Dict[str, pd.DataFrame]:
         """return the analysis results of the performance"""
 
-        position = pd.DataFrame.from_dict(self.position, orient="index")
-        position.index = pd.to_datetime(position.index)
-        position.index.name = "datetime"
-        value = pd.DataFrame.from_dict(self.value, orient="index")
-        value.index = pd.to_datetime(value.index)
-        value.index.name = "datetime"
-        wgt = value.copy(deep=True)
-        wgt = wgt.div(value.sum(axis=1), axis=0).fillna(0)
-
-        # portfolio total value, daily pnl and daily return
-        portfolio = value.sum(axis=1).to_frame(name="total_value")
-        portfolio["daily_pnl"] = (portfolio["total_value"] - portfolio["total_value"].shift(1)).fillna(0)
-        portfolio["daily_return"] = portfolio["total_value"].pct_change().fillna(0)
+        n = self._n
+        # truncate to seconds, same resolution as the "%Y-%m-%d %H:%M:%S" format used previously
+        index = pd.DatetimeIndex(num2datetime64(self._dt[:n], tz=self._tz), name="datetime").floor("s")
+        pos, val = self._pos[:n], self._val[:n]
+        # one row per second, sub-second bars fall on the same timestamp once truncated: keep the last row
+        keep = ~index.duplicated(keep="last")
+        if not keep.all():
+            index, pos, val = index[keep], pos[keep], val[keep]
+        position = pd.DataFrame(pos, index=index, columns=self._names)
+        value = pd.DataFrame(val, index=index, columns=self._names)
+        return self.summarize(position, value)
+
+    @staticmethod
+    def summarize(position: pd.DataFrame, value: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """derive the position weights and the portfolio performance from the position series
+
+        Parameters
+        ----------
+        position : pd.DataFrame
+            time series of position quantity, one column per instrument and cash as "MNYFUND"
+        value : pd.DataFrame
+            time series of position value, same layout as position
+
+        Returns
+        -------
+        Dict[str, pd.DataFrame]
+            analysis results, same layout as get_analysis()
+        """
+        # position weights, NaN values are skipped in the total as pandas sum() does, and weighted 0
+        v = value.to_numpy()
+        total = np.nansum(v, axis=1, keepdims=True)
+        w = np.divide(v, total, out=np.zeros_like(v), where=total != 0)
+        w[np.isnan(w)] = 0
+        wgt = pd.DataFrame(w, index=value.index, columns=value.columns)
+
+        # portfolio total value, daily pnl and daily return, 0 on the 1st day and after a zero total value
+        tv = total[:, 0]
+        prev = tv[:-1]
+        pnl = np.zeros_like(tv)
+        ret = np.zeros_like(tv)
+        np.subtract(tv[1:], prev, out=pnl[1:])
+        np.divide(pnl[1:], prev, out=ret[1:], where=prev != 0)
+        portfolio = pd.DataFrame({"total_value": tv, "daily_pnl": pnl, "daily_return": ret}, index=value.index)
 
         # return the analysis results
         # position_qty: time series of position quantity
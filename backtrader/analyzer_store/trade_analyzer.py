@@ -1,7 +1,93 @@
 import logging
+import numpy as np
 import pandas as pd
 import backtrader as bt
 from backtrader.trade import Trade
+from backtrader.utils.npdates import num2datetime64
+from backtrader.utils.nplines import line_window
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # numba is optional, fall back to the numpy reduction
+
+
+def _mfe_mae_loop(highs, lows, open_price, is_long):
+    """single pass max / min reduction, compiled with numba when available"""
+    hmax = highs[0]
+    lmin = lows[0]
+    for i in range(1, highs.size):
+        if highs[i] > hmax:
+            hmax = highs[i]
+        if lows[i] < lmin:
+            lmin = lows[i]
+    hc = hmax / open_price - 1.0
+    lc = lmin / open_price - 1.0
+    return (hc, lc) if is_long else (-lc, -hc)
+
+
+def _mfe_mae_np(highs, lows, open_price, is_long):
+    """numpy fallback of _mfe_mae_loop
+
+    same NaN handling as the loop and the builtin max() / min(): a NaN 1st value is returned, other NaN are skipped
+    """
+    hmax = highs[0] if np.isnan(highs[0]) else np.nanmax(highs)
+    lmin = lows[0] if np.isnan(lows[0]) else np.nanmin(lows)
+    hc = hmax / open_price - 1.0
+    lc = lmin / open_price - 1.0
+    return (hc, lc) if is_long else (-lc, -hc)
+
+
+_mfe_mae_kernel = _mfe_mae_np if njit is None else njit(cache=True)(_mfe_mae_loop)
+
+
+def _mfe_mae_batch_loop(highs, lows, starts, ends, open_prices, is_long):
+    """excursions of all the close trades of one instrument, trade k spans highs[starts[k]:ends[k]]"""
+    n = starts.size
+    mfp = np.empty(n)
+    mfl = np.empty(n)
+    for k in range(n):
+        hc, lc = _mfe_mae_kernel(highs[starts[k] : ends[k]], lows[starts[k] : ends[k]], open_prices[k], is_long[k])
+        mfp[k] = hc
+        mfl[k] = lc
+    return mfp, mfl
+
+
+_mfe_mae_batch_kernel = _mfe_mae_batch_loop if njit is None else njit(cache=True)(_mfe_mae_batch_loop)
+
+# maximum favorable and adverse excursions of a trade: (max floating profit, max floating loss)
+# use the ahead of time compiled kernels when built (python -m backtrader._hot_build), no jit stall on first call
+try:
+    from backtrader._bt_hot import mfe_mae as _mfe_mae, mfe_mae_batch as _mfe_mae_batch
+except ImportError:
+    _mfe_mae, _mfe_mae_batch = _mfe_mae_kernel, _mfe_mae_batch_kernel
+
+# trade record columns, shared by open and close trades
+OPEN_COLS = [
+    "ref_id",
+    "trade_id",
+    "ticker",
+    "action",
+    "exe_date",
+    "exe_price",
+    "avg_cost",  # the status.price has already been computed using average cost method
+    "exe_qty",
+    "open_qty",
+    "trade_value",  # gross trade notional value
+    "commission",
+]
+# trade record columns, close trades only
+CLOSE_COLS = [
+    "chng%",  # price change %: price close / price open - 1
+    "pnl",  # total price pnl excluding commission
+    "pnl%",  # pnl / total portfolio value
+    "nbars",  # number of bars the trade was open
+    "pnl/bar",
+    "max_floatin_profit",
+    "max_floating_loss",
+]
+ALL_COLS = OPEN_COLS + CLOSE_COLS
+_OPEN_PAD = (np.nan,) * len(CLOSE_COLS)  # open trades have no close trade fields
 
 
 # Analyzer for performance evaluation
@@ -9,10 +95,14 @@ class TradeAnalyzer(bt.Analyzer):
 
     def __init__(self):
         """initialize the trade analyzer"""
-        self.open_trades = []
-        self.close_trades = []
+        self._rows = []  # trade records, one tuple per trade, ordered as ALL_COLS
+        self._excursions = []  # close trades pending the MFE / MAE calculation, see _track_excursion()
         self._trade_id = 0
 
+    def stop(self):
+        """compute the pending excursions, the analyzers returned by optimizations are pickled without the lines"""
+        self._fill_excursions()
+
     def notify_trade(self, trade: Trade):
         """Notify trade details to the analyzer"""
         # backtrader/strategy.py/Strategy._notify() method calls this method
@@ -44,12 +134,6 @@ class TradeAnalyzer(bt.Analyzer):
         direction_ = None
         for trd in trade.history:
             # NOTE: trade.history is a list of backtrader.trade.TradeHistory objects
-            # 2 attributes: "event" and "status"
-            # event: odict_keys(['order', 'size', 'price', 'commission'])
-            # status: odict_keys(['status', 'dt', 'barlen', 'size', 'price', 'value', 'pnl', 'pnlcomm', 'tz'])
-
-            # action: if the trade direction is the same as the position direction then it is an open trade
-            action_ = "open" if trd.event.size * (trd.status.size) > 0 else "close"
 
             # if after the trade, size = 0, then the direction should be the same as the last trade
             if trd.status.size != 0:
@@ -58,112 +142,96 @@ class TradeAnalyzer(bt.Analyzer):
             if direction_ is None:
                 raise ValueError(f"Trade direction is not found for trade {trade.ref}")
 
-            action_direction = f"{action_} {direction_}"
-            ticker = trade.getdataname()
-            ref_id = trade.ref  # backtrader, native reference id, unique for the entire liefspan of an open position
-            exe_price = trd.event.price
-            open_qty = trd.status.size
-            exe_qty = trd.event.size
-            # exe_date = bt.num2date(trd.status.dt).date()
-            _status_dt = bt.num2date(trd.status.dt)
-            exe_date = bt.num2date(trd.event.order.executed.dt)  # execution date of the trade
-            trd_value = exe_price * exe_qty
-
-            if action_ == "open":
-                # handle open trades
-                self.open_trades.append(
-                    {
-                        "ref_id": ref_id,
-                        "trade_id": self._trade_id,
-                        "ticker": ticker,
-                        "action": action_direction,
-                        "exe_date": exe_date,
-                        "exe_price": exe_price,
-                        "avg_cost": trd.status.price,  # the status.price has already been computed using average cost method
-                        "exe_qty": exe_qty,
-                        "open_qty": open_qty,
-                        "trade_value": abs(trd_value),  # gross trade notional value
-                        "commission": trd.event.commission,
-                    }
-                )
-            else:
-                nbars = trd.status.barlen
-                # pnlcomm = trd.status.pnlcomm
-                pnl = (trd.event.price - trd.status.price) * abs(trd.event.size)
-                pnl = pnl if direction_ == "long" else -pnl
-                pnl_percent = pnl / self.strategy.broker.getvalue()
-                pnl_per_bar = pnl / nbars if nbars else 0
-
-                # max and min prices during the trade period
-                high_col = "close" if trade.data._colmapping.get("high") is None else "high"
-                low_col = "close" if trade.data._colmapping.get("low") is None else "low"
-                price_max = max(getattr(trade.data, high_col).get(ago=0, size=nbars + 1))
-                price_min = min(getattr(trade.data, low_col).get(ago=0, size=nbars + 1))
-
-                # maximum favorable and adverse excursions
-                highest_price_change = price_max / trd.status.price - 1
-                lowest_price_change = price_min / trd.status.price - 1
-
-                mfp = highest_price_change if direction_ == "long" else -lowest_price_change
-                mfl = lowest_price_change if direction_ == "long" else -highest_price_change
-
-                # handle close trades, using average cost method
-                self.close_trades.append(
-                    {
-                        "ref_id": ref_id,
-                        "trade_id": self._trade_id,
-                        "ticker": ticker,
-                        "action": action_direction,
-                        "avg_cost": trd.status.price,  # the status.price has already been computed using average cost method
-                        "exe_date": exe_date,
-                        "exe_price": exe_price,
-                        "exe_qty": exe_qty,
-                        "open_qty": open_qty,
-                        "trade_value": abs(trd_value),  # gross trade notional value
-                        "commission": trd.event.commission,
-                        "chng%": exe_price / trd.status.price - 1,  # price change %: price close / price open - 1
-                        "pnl": pnl,  # total price pnl excluding commission
-                        "pnl%": pnl_percent,  # pnl / total portfolio value
-                        "nbars": nbars,  # number of bars the trade was open
-                        "pnl/bar": round(pnl_per_bar, 4),
-                        "max_floatin_profit": round(mfp, 4),
-                        "max_floating_loss": round(mfl, 4),
-                    }
-                )
-
-            # keep track of the universal trade id
-            self._trade_id += 1
+            self._record(trade, trd, direction_)
 
     def get_analysis(self):
         """run the trade analysis"""
-        open_trades = pd.DataFrame(self.open_trades)
-        close_trades = pd.DataFrame(self.close_trades)
-        trades = pd.concat([open_trades, close_trades], axis=0)
+        self._fill_excursions()
+        trades = pd.DataFrame(self._rows, columns=ALL_COLS)
         if trades.empty:
             logging.warning("TradeAnalyzer: get_analysis(): trade: no trade records ...")
-            return pd.DataFrame(
-                columns=[
-                    "ref_id",
-                    "trade_id",
-                    "ticker",
-                    "action",
-                    "exe_date",
-                    "exe_price",
-                    "avg_cost",
-                    "exe_qty",
-                    "open_qty",
-                    "trade_value",
-                    "commission",
-                    "chng%",
-                    "pnl",
-                    "pnl%",
-                    "nbars",
-                    "pnl/bar",
-                    "max_floatin_profit",
-                    "max_floating_loss",
-                ]
+            return trades
+        trades["exe_date"] = num2datetime64(trades["exe_date"].to_numpy())
+        # sort by execution date, then trade id; trade_id is unique, so the ticker never breaks a tie
+        order = np.lexsort((trades["trade_id"].to_numpy(), trades["exe_date"].to_numpy().view(np.int64)))
+        return trades.iloc[order].reset_index(drop=True)
+
+    def get_analysis_pl(self):
+        """run the trade analysis, same records as get_analysis() as a polars DataFrame
+
+        ticker and action are categorical columns, exe_qty, open_qty and nbars are float columns
+
+        Returns
+        -------
+        polars.DataFrame
+            trade records sorted by execution date and trade id
+        """
+        # polars is optional, imported on first use only
+        try:
+            import polars as pl
+        except ImportError:
+            raise ImportError("TradeAnalyzer.get_analysis_pl() requires polars, please use pip install polars")
+
+        # polars schema of the trade records, the string columns are dictionary encoded
+        schema = dict.fromkeys(ALL_COLS, pl.Float64)
+        schema.update(
+            ref_id=pl.Int64,
+            trade_id=pl.Int64,
+            ticker=pl.Categorical,
+            action=pl.Categorical,
+            exe_date=pl.Float64,  # float datetime until converted below
+        )
+
+        self._fill_excursions()
+        trades = pl.DataFrame(self._rows, schema=schema, orient="row")
+        if trades.is_empty():
+            logging.warning("TradeAnalyzer: get_analysis_pl(): trade: no trade records ...")
+            return trades.with_columns(pl.col("exe_date").cast(pl.Datetime("us")))
+        trades = trades.with_columns(pl.Series("exe_date", num2datetime64(trades["exe_date"].to_numpy())))
+        return trades.sort(["exe_date", "trade_id"])
+
+    def _track_excursion(self, high, low, nbars: int, open_price: float, is_long: bool):
+        """queue the MFE / MAE calculation of the close trade about to be appended to the records
+
+        the excursions are computed in stop() over the full line buffers, one pass per instrument,
+        and NaN placeholders are returned. Memory bounded lines (exactbars) drop the
+        older bars, so the excursions are computed right away for these
+
+        Returns
+        -------
+        tuple[float, float]
+            max floating profit, max floating loss
+        """
+        if high.mode == high.QBuffer or low.mode == low.QBuffer:
+            return _mfe_mae(line_window(high, nbars + 1), line_window(low, nbars + 1), open_price, is_long)
+
+        # same window as line.get(ago=0, size=nbars + 1), in absolute buffer positions
+        end = high.idx + 1
+        self._excursions.append((len(self._rows), high, low, end - nbars - 1, end, open_price, is_long))
+        return np.nan, np.nan
+
+    def _fill_excursions(self):
+        """compute the queued MFE / MAE, write them into the close trade records and release the lines"""
+        # group the close trades by instrument lines, to reduce each buffer in one pass
+        groups = dict()
+        for rec in self._excursions:
+            groups.setdefault((id(rec[1]), id(rec[2])), []).append(rec)
+        self._excursions = []
+
+        for recs in groups.values():
+            rows, highs, lows, starts, ends, open_prices, is_long = zip(*recs)
+            # zero-copy views of the line buffers, local to this call: a view held across bars would
+            # make the next append of the array raise BufferError
+            mfp_, mfl_ = _mfe_mae_batch(
+                np.frombuffer(highs[0].array, dtype=np.float64),
+                np.frombuffer(lows[0].array, dtype=np.float64),
+                np.asarray(starts, dtype=np.int64),
+                np.asarray(ends, dtype=np.int64),
+                np.asarray(open_prices, dtype=np.float64),
+                np.asarray(is_long, dtype=np.bool_),
             )
-        return trades.sort_values(by=["exe_date", "trade_id", "ticker"], ignore_index=True)
+            for row, hc, lc in zip(rows, np.round(mfp_, 4).tolist(), np.round(mfl_, 4).tolist()):
+                self._rows[row] = self._rows[row][:-2] + (hc, lc)
 
     def _handle_trade(self, trade: Trade):
         """parse latest trade object, which contains the latest event and status
@@ -173,16 +241,8 @@ class TradeAnalyzer(bt.Analyzer):
         trade : Trade
             backtrader.trade.Trade object
         """
-
-        # 2 attributes: "event" and "status"
-        # event: odict_keys(['order', 'size', 'price', 'commission'])
-        # status: odict_keys(['status', 'dt', 'barlen', 'size', 'price', 'value', 'pnl', 'pnlcomm', 'tz'])
-
-        ref_id = trade.ref  # backtrader, native reference id, unique for the entire liefspan of an open position
         direction_ = "long" if trade.long else "short"
         trd = trade.history[-1]  # get the latest trade object
-        # action: if the trade direction is the same as the position direction then it is an open trade
-        action_ = "open" if trd.event.size * (trd.status.size) > 0 else "close"
 
         # if after the trade, size = 0, then the direction should be the same as the last trade
         # if trd.status.size != 0:
@@ -190,32 +250,53 @@ class TradeAnalyzer(bt.Analyzer):
         # if direction_ is None:
         #     raise ValueError(f"Trade direction is not found for trade {trade.ref}")
 
-        action_direction = f"{action_} {direction_}"
-        ticker = trade.getdataname()
+        self._record(trade, trd, direction_)
+
+    def _record(self, trade: Trade, trd, direction_: str):
+        """append the open or close trade record of one trade history entry
+
+        Parameters
+        ----------
+        trade : Trade
+            backtrader.trade.Trade object
+        trd : TradeHistory
+            entry of trade.history to record
+        direction_ : str
+            position direction, "long" or "short"
+        """
+
+        # 2 attributes: "event" and "status"
+        # event: odict_keys(['order', 'size', 'price', 'commission'])
+        # status: odict_keys(['status', 'dt', 'barlen', 'size', 'price', 'value', 'pnl', 'pnlcomm', 'tz'])
+
+        # action: if the trade direction is the same as the position direction then it is an open trade
+        es, ss = trd.event.size, trd.status.size
+        action_ = "open" if (es > 0 and ss > 0) or (es < 0 and ss < 0) else "close"
+
         ref_id = trade.ref  # backtrader, native reference id, unique for the entire liefspan of an open position
         exe_price, open_qty, exe_qty = trd.event.price, trd.status.size, trd.event.size
-        # exe_date = bt.num2date(trd.status.dt).date()
-        _status_dt = bt.num2date(trd.status.dt)
-        exe_date = bt.num2date(trd.event.order.executed.dt)  # execution date of the trade
+        # execution date of the trade, kept as backtrader float datetime and converted in get_analysis()
+        exe_date = trd.event.order.executed.dt
         trd_value = exe_price * exe_qty
 
+        # fields shared by open and close trades, ordered as OPEN_COLS
+        row = (
+            ref_id,
+            self._trade_id,
+            trade.getdataname(),
+            f"{action_} {direction_}",
+            exe_date,
+            exe_price,
+            trd.status.price,
+            exe_qty,
+            open_qty,
+            abs(trd_value),
+            trd.event.commission,
+        )
+
         if action_ == "open":
             # handle open trades
-            self.open_trades.append(
-                {
-                    "ref_id": ref_id,
-                    "trade_id": self._trade_id,
-                    "ticker": ticker,
-                    "action": action_direction,
-                    "exe_date": exe_date,
-                    "exe_price": exe_price,
-                    "avg_cost": trd.status.price,  # the status.price has already been computed using average cost method
-                    "exe_qty": exe_qty,
-                    "open_qty": open_qty,
-                    "trade_value": abs(trd_value),  # gross trade notional value
-                    "commission": trd.event.commission,
-                }
-            )
+            self._rows.append(row + _OPEN_PAD)
         else:
             nbars = trd.status.barlen
             # pnlcomm = trd.status.pnlcomm
@@ -227,38 +308,23 @@ class TradeAnalyzer(bt.Analyzer):
             # max and min prices during the trade period
             high_col = "close" if trade.data._colmapping.get("high") is None else "high"
             low_col = "close" if trade.data._colmapping.get("low") is None else "low"
-            price_max = max(getattr(trade.data, high_col).get(ago=0, size=nbars + 1))
-            price_min = min(getattr(trade.data, low_col).get(ago=0, size=nbars + 1))
+            high_line, low_line = getattr(trade.data, high_col), getattr(trade.data, low_col)
 
             # maximum favorable and adverse excursions
-            highest_price_change = price_max / trd.status.price - 1
-            lowest_price_change = price_min / trd.status.price - 1
-
-            mfp = highest_price_change if direction_ == "long" else -lowest_price_change
-            mfl = lowest_price_change if direction_ == "long" else -highest_price_change
-
-            # handle close trades, using average cost method
-            self.close_trades.append(
-                {
-                    "ref_id": ref_id,
-                    "trade_id": self._trade_id,
-                    "ticker": ticker,
-                    "action": action_direction,
-                    "avg_cost": trd.status.price,  # the status.price has already been computed using average cost method
-                    "exe_date": exe_date,
-                    "exe_price": exe_price,
-                    "exe_qty": exe_qty,
-                    "open_qty": open_qty,
-                    "trade_value": abs(trd_value),  # gross trade notional value
-                    "commission": trd.event.commission,
-                    "chng%": exe_price / trd.status.price - 1,  # price change %: price close / price open - 1
-                    "pnl": pnl,  # total price pnl excluding commission
-                    "pnl%": pnl_percent,  # pnl / total portfolio value
-                    "nbars": nbars,  # number of bars the trade was open
-                    "pnl/bar": round(pnl_per_bar, 4),
-                    "max_floatin_profit": round(mfp, 4),
-                    "max_floating_loss": round(mfl, 4),
-                }
+            mfp, mfl = self._track_excursion(high_line, low_line, nbars, trd.status.price, direction_ == "long")
+
+            # handle close trades, using average cost method, ordered as CLOSE_COLS
+            self._rows.append(
+                row
+                + (
+                    exe_price / trd.status.price - 1,
+                    pnl,
+                    pnl_percent,
+                    nbars,
+                    round(pnl_per_bar, 4),
+                    round(mfp, 4),
+                    round(mfl, 4),
+                )
             )
 
         # keep track of the universal trade id
@@ -1,6 +1,7 @@
 """define a collection of internal datafeed objects"""
 
 from backtrader.feeds import PandasData
+from backtrader.utils import date2num
 
 
 class CloseOnlyDatafeed(PandasData):
@@ -25,3 +26,32 @@ class CloseOnlyDatafeed(PandasData):
         ("volume", None),
         ("openinterest", None),
     )
+
+    def start(self):
+        super().start()
+
+        # PandasData.start() has resolved the column mapping to column positions
+        # read the close prices and the timestamps once, _load() then only indexes python lists
+        df = self.p.dataname
+        others = [f for f in self.getlinealiases() if f not in ("datetime", "close")]
+        self._closeonly = all(self._colmapping[f] is None for f in others)
+        if not self._closeonly:
+            return  # other columns mapped by the user, use the generic PandasData._load()
+
+        close_ix = self._colmapping["close"]
+        self._closes = None if close_ix is None else df.iloc[:, close_ix].tolist()
+        dt_ix = self._colmapping["datetime"]
+        tstamps = df.index if dt_ix is None else df.iloc[:, dt_ix]
+        self._dtnums = [date2num(t.to_pydatetime()) for t in tstamps]
+
+    def _load(self):
+        if not self._closeonly:
+            return super()._load()
+
+        self._idx += 1
+        if self._idx >= len(self._dtnums):
+            return False
+        if self._closes is not None:
+            self.lines.close[0] = self._closes[self._idx]
+        self.lines.datetime[0] = self._dtnums[self._idx]
+        return True
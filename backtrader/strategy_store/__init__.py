@@ -1 +1,2 @@
 from backtrader.strategy_store.strategy import StrategyMaster
+from backtrader.strategy_store.parallel import run_parallel
@@ -0,0 +1,126 @@
+"""run independent backtests in parallel processes and merge the results of the internal analyzers"""
+
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+from backtrader.analyzer_store.performance_analyzer import PerformanceAnalyzer
+
+
+def run_parallel(
+    run_single: Callable[[Any], Dict[str, Any]],
+    configs: Iterable[Any],
+    max_workers: Optional[int] = None,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+) -> Dict[str, Any]:
+    """run one backtest per config in a process pool and merge the analyses
+
+    each backtest must trade its own set of instruments (ValueError otherwise), with its own broker;
+    the merged portfolio holds all the instruments and the sum of the cash of every backtest
+
+    Parameters
+    ----------
+    run_single : Callable[[Any], Dict[str, Any]]
+        module level function (picklable) running a single backtest, returns a dict with the keys
+        "trades": TradeAnalyzer.get_analysis(), and / or "performance": PerformanceAnalyzer.get_analysis()
+    configs : Iterable[Any]
+        one (picklable) config per backtest, passed to run_single
+    max_workers : int, optional
+        number of worker processes, by default os.cpu_count()
+    initializer : Callable, optional
+        called once per worker process, e.g. to load the reference data shared by the backtests
+    initargs : tuple, optional
+        arguments passed to initializer
+
+    Returns
+    -------
+    Dict[str, Any]
+        merged analyses, same keys and layout as returned by run_single
+    """
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        results = list(executor.map(run_single, configs))
+
+    res = dict()
+    trades = [r["trades"] for r in results if "trades" in r]
+    if trades:
+        res["trades"] = merge_trades(trades)
+    performance = [r["performance"] for r in results if "performance" in r]
+    if performance:
+        res["performance"] = merge_performance(performance)
+    return res
+
+
+def _check_instruments(instruments: List[Iterable[str]]):
+    """raise ValueError if an instrument is traded by more than one backtest"""
+    seen = set()
+    for names in instruments:
+        names = set(names)
+        shared = seen & names
+        if shared:
+            raise ValueError(f"instruments {sorted(shared)} are traded by more than one backtest")
+        seen |= names
+
+
+def merge_trades(trades: List[pd.DataFrame]) -> pd.DataFrame:
+    """merge the TradeAnalyzer results of independent backtests
+
+    trades are ordered by execution date, then by backtest; trade_id is renumbered to stay unique,
+    ref_id is only unique within a backtest, and pnl% stays relative to the portfolio value of its
+    own backtest
+
+    Parameters
+    ----------
+    trades : List[pd.DataFrame]
+        TradeAnalyzer.get_analysis() of each backtest
+
+    Returns
+    -------
+    pd.DataFrame
+        merged trade records
+    """
+    if not trades:
+        raise ValueError("merge_trades(): no trade records to merge")
+    _check_instruments([t["ticker"].unique() for t in trades if not t.empty])
+    trades = [t for t in trades if not t.empty] or trades[:1]
+    # each backtest is already sorted by execution date, a stable sort keeps the backtest order
+    res = pd.concat(trades, axis=0, ignore_index=True).sort_values(by="exe_date", kind="stable", ignore_index=True)
+    res["trade_id"] = range(len(res))
+    return res
+
+
+def merge_performance(performance: List[Dict[str, pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+    """merge the PerformanceAnalyzer results of independent backtests on their common dates
+
+    Parameters
+    ----------
+    performance : List[Dict[str, pd.DataFrame]]
+        PerformanceAnalyzer.get_analysis() of each backtest
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        merged analysis results, same layout as PerformanceAnalyzer.get_analysis()
+    """
+    if not performance:
+        raise ValueError("merge_performance(): no analysis results to merge")
+    _check_instruments([p["position_qty"].columns.drop("MNYFUND") for p in performance])
+
+    def _merge(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        # instrument columns side by side, the cash of every backtest is summed up
+        res = pd.concat([f.drop(columns="MNYFUND") for f in frames], axis=1, join="inner")
+        res["MNYFUND"] = sum(f["MNYFUND"] for f in frames).reindex(res.index)
+        return res
+
+    index = performance[0]["position_qty"].index
+    if not all(p["position_qty"].index.equals(index) for p in performance):
+        logging.warning("merge_performance(): backtests have different dates, only the common dates are kept ...")
+    position = _merge([p["position_qty"] for p in performance])
+    value = _merge([p["position_value"] for p in performance])
+    return PerformanceAnalyzer.summarize(position, value)
@@ -3,13 +3,27 @@
 import logging
 import numpy as np
 import backtrader as bt
+from backtrader.utils.nplines import line_window
 
-# TODO: refactor the portfolio realized volatility calculation
 # TODO: add trading pause methods
 # TODO: add basket trading function, to handle margin trading issues
 
+# logging levels accepted by StrategyMaster.log(), unrecognized levels are logged as info
+_LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+# StrategyMaster.log() goes through the root logger, its level is checked before formatting the messages
+_ROOT_LOGGER = logging.getLogger()
+
 
 class Position(object):
+    # a Position is built per open position on every getOpenPosition() call, no per instance __dict__
+    __slots__ = ("_ticker", "_size", "_price")
+
     def __init__(self, ticker: str, size: float, price: float) -> None:
         self._ticker = ticker
         self._size = size
@@ -46,29 +60,24 @@ class StrategyMaster(bt.Strategy):
 
     def log(self, txt, dt=None, level="debug"):
         """Logging function fot this strategy"""
+        lvl = _LOG_LEVELS.get(level, logging.INFO)
+        if not _ROOT_LOGGER.isEnabledFor(lvl):
+            return
         dt = dt or self.datas[0].datetime.date(0)
-        if level == "debug":
-            logging.debug("%s: %s" % (dt.isoformat(), txt))
-        elif level == "info":
-            logging.info("%s: %s" % (dt.isoformat(), txt))
-        elif level == "warning":
-            logging.warning("%s: %s" % (dt.isoformat(), txt))
-        elif level == "error":
-            logging.error("%s: %s" % (dt.isoformat(), txt))
-        elif level == "critical":
-            logging.critical("%s: %s" % (dt.isoformat(), txt))
-        else:
-            # unrecognized logging level, set to info()
-            logging.info("%s: %s" % (dt.isoformat(), txt))
+        logging.log(lvl, "%s: %s", dt.isoformat(), txt)
 
     def notify_order(self, order):
         """optional, log the order status"""
 
+        # the messages are only logged at debug level, skip the formatting otherwise
+        if not _ROOT_LOGGER.isEnabledFor(logging.DEBUG):
+            return
+
         # handle orders which have not been handled
         if order.status in [order.Submitted, order.Accepted]:
             self.log(
                 f"notify_order(): date: %s, order: %s, status: %s"
-                % (self.dt(0).strftime("%Y%m%d"), order.data._name, order.getstatusname(order.status)),
+                % (self.datetime.date(0).strftime("%Y%m%d"), order.data._name, order.getstatusname(order.status)),
             )
             return
 
@@ -124,17 +133,20 @@ class StrategyMaster(bt.Strategy):
             open positions
         """
         res = dict()
+        # price lines already validated, keyed by (data name, field); created on the 1st call, as the
+        # subclasses do not necessarily call StrategyMaster.__init__()
+        lines = self.__dict__.setdefault("_field_lines", dict())
         for p, item in self.getpositions().items():
             if item.size != 0:
-                data_ = self.getdatabyname(p._name)
-                # raise error if field not in data feed
-                if field not in data_._colmapping.keys():
-                    raise ValueError(f"field {field} does not exist in the data feed")
-                res[p._name] = Position(
-                    p._name,
-                    item.size,
-                    getattr(data_, field).get(ago)[0],
-                )
+                name = p._name
+                line = lines.get((name, field))
+                if line is None:
+                    data_ = self.getdatabyname(name)
+                    # raise error if field not in data feed
+                    if field not in data_._colmapping:
+                        raise ValueError(f"field {field} does not exist in the data feed")
+                    line = lines[(name, field)] = getattr(data_, field)
+                res[name] = Position(name, item.size, line[ago])
 
         return res
 
@@ -154,24 +166,17 @@ class StrategyMaster(bt.Strategy):
         # ago = 0 for accessing the portfolio value is yesterday
         # len(self.stats.broker.value) != len(self.data)
         n_ = min(look_back_periods, len(self.stats.broker.value))
-        total = np.array(self.stats.broker.value.get(0, n_), dtype=np.float32)
-        # cash = np.array(self.stats.broker.cash.get(0, n_), dtype=np.float32)
+        total = line_window(self.stats.broker.value, n_)
+        # cash = line_window(self.stats.broker.cash, n_)
         if n_ == 0:
             return 0.0
         if len(total) == 0:
             raise ValueError("portfolio value is empty ... look back period could be too long ...")
         if n_ < look_back_periods:
             self.log("getPortfolioRealizedVol(): data length shorter than the look back window", level="warning")
-        rets = (
-            np.divide(
-                total,
-                np.roll(total, 1),
-                out=np.array([np.nan] * len(total)),
-                where=np.roll(total, 1) != 0,
-            )
-            - 1
-        )
-        rets[0] = 0  # reset the 1st day return to 0.0
-        if all(np.isnan(rets)):
-            return 0.0
-        return np.sqrt(np.sum(rets**2, where=~np.isnan(rets)) / sum((~np.isnan(rets))) * 252)  # annualized volatility
+        # daily returns, skipping the days with zero portfolio value on the previous day
+        prev = total[:-1]
+        mask = prev != 0
+        rets = total[1:][mask] / prev[mask] - 1
+        # the 1st day return is counted as 0.0
+        return float(np.sqrt(np.dot(rets, rets) / (rets.size + 1) * 252))  # annualized volatility
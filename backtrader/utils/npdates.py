@@ -0,0 +1,40 @@
+"""vectorized conversion of the backtrader float datetimes, numpy version of dateintern.num2date"""
+
+import datetime
+import numpy as np
+import pandas as pd
+from .dateintern import HOURS_PER_DAY, MINUTES_PER_HOUR, SECONDS_PER_MINUTE, MUSECONDS_PER_SECOND
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def num2datetime64(x, tz=None) -> np.ndarray:
+    """convert backtrader float datetimes to naive datetime64[us], same results as bt.num2date() element wise
+
+    Parameters
+    ----------
+    x : array like
+        float datetimes, as stored in the backtrader datetime lines
+    tz : tzinfo, optional
+        timezone to convert to, by default None (UTC)
+
+    Returns
+    -------
+    np.ndarray
+        datetime64[us] array
+    """
+    x = np.asarray(x, dtype=np.float64)
+    ix = np.trunc(x)
+    hour, remainder = np.divmod(HOURS_PER_DAY * (x - ix), 1)
+    minute, remainder = np.divmod(MINUTES_PER_HOUR * remainder, 1)
+    second, remainder = np.divmod(SECONDS_PER_MINUTE * remainder, 1)
+    microsecond = np.trunc(MUSECONDS_PER_SECOND * remainder)
+    # compensate for rounding errors, as num2date() does
+    microsecond[microsecond < 10] = 0
+    microsecond[microsecond > 999990] = MUSECONDS_PER_SECOND
+
+    seconds = (ix.astype(np.int64) - _EPOCH_ORDINAL) * 86400 + (hour * 3600 + minute * 60 + second).astype(np.int64)
+    res = (seconds * 1000000 + microsecond.astype(np.int64)).astype("datetime64[us]")
+    if tz is not None:
+        res = pd.DatetimeIndex(res).tz_localize("UTC").tz_convert(tz).tz_localize(None).to_numpy()
+    return res
@@ -0,0 +1,29 @@
+"""numpy access to the backtrader line buffers"""
+
+import numpy as np
+
+
+def line_window(line, size: int, ago: int = 0) -> np.ndarray:
+    """values of line.get(ago=ago, size=size) as a float64 numpy array
+
+    unbounded buffers are sliced from a numpy view of the array, no boxing of the values into a list, and
+    copied: the array is appended on the next bar, which raises BufferError while a view is held
+
+    Parameters
+    ----------
+    line : LineBuffer
+        backtrader line, e.g. data.close
+    size : int
+        number of values, ending at ago
+    ago : int, optional
+        index of the last value, by default 0, for the current bar
+
+    Returns
+    -------
+    np.ndarray
+        float64 array of the values
+    """
+    if line.mode == line.QBuffer:
+        return np.asarray(line.get(ago=ago, size=size), dtype=np.float64)
+    end = line.idx + ago + 1
+    return np.frombuffer(line.array, dtype=np.float64)[end - size : end].copy()
@@ -117,12 +117,16 @@ setuptools.setup(
     # $ pip install -e .[dev,test]
     extras_require={
         'plotting':  ['matplotlib'],
+        'numba':  ['numba'],
+        'polars':  ['polars'],
     },
 
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
     # have to be included in MANIFEST.in as well.
     # package_data={'sample': ['package_data.dat'],},
+    # ahead of time compiled kernels, when built with: python -m backtrader._hot_build
+    package_data={'backtrader': ['_bt_hot*.so', '_bt_hot*.pyd']},
 
     # Although 'package_data' is the preferred approach, in some case you may
     # need to place data files outside of your packages. See:
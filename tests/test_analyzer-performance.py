@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import testcommon
+
+import backtrader as bt
+from backtrader.analyzer_store import PerformanceAnalyzer
+
+datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                        testcommon.datafiles[0])
+
+# bars missing from the 1st data feed, the 2nd data feed still has them
+DROPBARS = [20, 21, 50, 100, 101]
+
+
+def getframe(drop=()):
+    df = pd.read_csv(datapath, index_col=0, parse_dates=True)
+    return df.drop(df.index[list(drop)])
+
+
+class RunStrategy(bt.Strategy):
+    params = (('size', 1),)
+
+    def next(self):
+        if len(self) % 20 == 0:
+            self.buy(self.datas[len(self) % 40 == 0], size=self.p.size)
+
+
+class SubsecondStrategy(bt.Strategy):
+
+    def next(self):
+        if len(self) % 7 == 0:
+            self.buy(size=1)
+
+
+def runperformance(cerebro_kwargs=dict(), drop=(), optimize=False):
+    cerebro = bt.Cerebro(**cerebro_kwargs)
+    cerebro.adddata(bt.feeds.PandasData(dataname=getframe(drop)), name='d0')
+    cerebro.adddata(bt.feeds.PandasData(dataname=getframe()), name='d1')
+    if optimize:
+        cerebro.optstrategy(RunStrategy, size=[1, 2])
+    else:
+        cerebro.addstrategy(RunStrategy)
+    cerebro.addanalyzer(PerformanceAnalyzer, _name='pa')
+    return cerebro.run()
+
+
+def test_run(main=False):
+    ndays = len(getframe(DROPBARS))
+    for preload in [True, False]:
+        for runonce in [True, False]:
+            strat = runperformance(dict(preload=preload, runonce=runonce),
+                                   drop=DROPBARS)[0]
+            analysis = strat.analyzers.pa.get_analysis()
+            if main:
+                print(analysis['performance'])
+
+            # one row per timestamp of the 1st data feed
+            for frame in analysis.values():
+                assert frame.index.is_unique
+                assert len(frame) == ndays
+
+            # the pnl is computed over the unique timestamps
+            perf = analysis['performance']
+            pnl = perf['total_value'].diff().fillna(0)
+            assert np.allclose(perf['daily_pnl'], pnl)
+
+
+def test_subsecond(main=False):
+    # bars 250 ms apart, the analysis has one row per second, the last one
+    index = pd.date_range('2024-01-02 09:30:00.100', periods=50, freq='250ms')
+    df = pd.DataFrame(dict(Open=1.0, High=1.0, Low=1.0, Volume=0, OpenInterest=0,
+                           Close=np.arange(1.0, 51.0)), index=index)
+    cerebro = bt.Cerebro()
+    cerebro.adddata(bt.feeds.PandasData(dataname=df), name='d0')
+    cerebro.addstrategy(SubsecondStrategy)
+    cerebro.addanalyzer(PerformanceAnalyzer, _name='pa')
+    strat = cerebro.run()[0]
+    analysis = strat.analyzers.pa.get_analysis()
+    if main:
+        print(analysis['performance'])
+
+    seconds = index.floor('s')
+    for frame in analysis.values():
+        assert frame.index.is_unique
+        assert (frame.index == seconds.unique()).all()
+
+    # values of the last bar of each second
+    last = df['Close'].groupby(seconds).last()
+    qty = analysis['position_qty']['d0']
+    assert np.allclose(analysis['position_value']['d0'], qty * last.to_numpy())
+    perf = analysis['performance']
+    assert np.allclose(perf['daily_pnl'], perf['total_value'].diff().fillna(0))
+
+
+def test_optreturn(main=False):
+    expected = runperformance()[0].analyzers.pa.get_analysis()
+    for maxcpus in [1, 2]:
+        results = runperformance(dict(maxcpus=maxcpus), optimize=True)
+        analyzer = results[0][0].analyzers.pa
+        # the analyzers returned by optimizations carry no data feed
+        assert len(pickle.dumps(analyzer)) < 64 * 1024
+
+        analysis = analyzer.get_analysis()
+        if main:
+            print(analysis['performance'])
+        for key, frame in expected.items():
+            pd.testing.assert_frame_equal(analysis[key], frame)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_subsecond(main=True)
+    test_optreturn(main=True)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+import pickle
+
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+import testcommon
+
+import backtrader as bt
+from backtrader.analyzer_store import TradeAnalyzer
+from backtrader.analyzer_store import trade_analyzer
+
+datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                        testcommon.datafiles[0])
+
+
+class RunStrategy(bt.Strategy):
+    params = (('size', 1),)
+
+    def next(self):
+        if len(self) % 20 == 0:
+            self.buy(size=self.p.size)
+        elif len(self) % 20 == 10:
+            self.close()
+
+
+class BoundedStrategy(RunStrategy):
+
+    def __init__(self):
+        # with exactbars=1 the data lines only keep the bars required by the
+        # indicators, enough for the trades of 10 bars
+        self.sma = bt.indicators.SMA(self.data, period=30)
+
+
+def runtrades(cerebro_kwargs=dict(), optimize=False, strategy=RunStrategy):
+    cerebro = bt.Cerebro(tradehistory=True, **cerebro_kwargs)
+    df = pd.read_csv(datapath, index_col=0, parse_dates=True)
+    cerebro.adddata(bt.feeds.PandasData(dataname=df), name='d0')
+    if optimize:
+        cerebro.optstrategy(strategy, size=[1, 2])
+    else:
+        cerebro.addstrategy(strategy)
+    cerebro.addanalyzer(TradeAnalyzer, _name='ta')
+    return cerebro.run()
+
+
+def test_run(main=False):
+    for exactbars in [False, -1, -2]:
+        strat = runtrades(dict(exactbars=exactbars))[0]
+        trades = strat.analyzers.ta.get_analysis()
+        if main:
+            print(trades)
+
+        assert len(trades) == 24
+        closed = trades[trades['action'] == 'close long']
+        assert len(closed) == 12
+        # the excursions are computed for every close trade
+        assert closed['max_floatin_profit'].notna().all()
+        assert closed['max_floating_loss'].notna().all()
+        assert (closed['max_floatin_profit'] >= closed['max_floating_loss']).all()
+
+
+def test_exactbars(main=False):
+    # memory bounded lines, the excursions are computed on the close trades
+    expected = runtrades(strategy=BoundedStrategy)[0].analyzers.ta.get_analysis()
+    for preload in [True, False]:
+        for runonce in [True, False]:
+            strat = runtrades(dict(exactbars=1, preload=preload, runonce=runonce),
+                              strategy=BoundedStrategy)[0]
+            assert strat.data.high.mode == strat.data.high.QBuffer
+            trades = strat.analyzers.ta.get_analysis()
+            if main:
+                print(trades)
+            pd.testing.assert_frame_equal(trades.drop(columns='ref_id'),
+                                          expected.drop(columns='ref_id'))
+
+
+def test_optreturn(main=False):
+    expected = runtrades()[0].analyzers.ta.get_analysis()
+    for maxcpus in [1, 2]:
+        results = runtrades(dict(maxcpus=maxcpus), optimize=True)
+        analyzer = results[0][0].analyzers.ta
+        # the analyzers returned by optimizations carry no data line
+        assert len(pickle.dumps(analyzer)) < 64 * 1024
+
+        trades = analyzer.get_analysis()
+        if main:
+            print(trades)
+        # ref_id is a process wide counter of the backtrader trades
+        pd.testing.assert_frame_equal(trades.drop(columns='ref_id'),
+                                      expected.drop(columns='ref_id'))
+
+
+def test_nan(main=False):
+    # NaN prices are skipped by the builtin max() / min(), unless 1st
+    highs = [
+        [1.1, np.nan, 1.3, 1.2],
+        [np.nan, 1.1, 1.3, 1.2],
+        [1.1, 1.2, 1.3, np.nan],
+    ]
+    lows = [
+        [0.9, 0.8, np.nan, 1.0],
+        [0.9, 0.8, 0.7, 1.0],
+        [np.nan, np.nan, 0.7, 1.0],
+    ]
+    kernels = [trade_analyzer._mfe_mae_loop, trade_analyzer._mfe_mae_np,
+               trade_analyzer._mfe_mae]
+    for high, low in zip(highs, lows):
+        for is_long in [True, False]:
+            hc, lc = max(high) / 1.05 - 1.0, min(low) / 1.05 - 1.0
+            chk = (hc, lc) if is_long else (-lc, -hc)
+            for kernel in kernels:
+                res = kernel(np.array(high), np.array(low), 1.05, is_long)
+                if main:
+                    print(kernel.__name__, res, chk)
+                np.testing.assert_allclose(res, chk)
+
+    # batched kernels, one trade per window
+    starts = np.arange(0, 12, 4)
+    args = (np.concatenate(highs), np.concatenate(lows), starts, starts + 4,
+            np.full(3, 1.05), np.ones(3, dtype=np.bool_))
+    chk = trade_analyzer._mfe_mae_batch_loop(*args)
+    np.testing.assert_allclose(trade_analyzer._mfe_mae_batch(*args), chk)
+    np.testing.assert_allclose(
+        chk, [[max(h) / 1.05 - 1.0 for h in highs],
+              [min(lo) / 1.05 - 1.0 for lo in lows]])
+
+
+def test_polars(main=False):
+    if pl is None:
+        return  # polars is optional
+
+    analyzer = runtrades()[0].analyzers.ta
+    trades = analyzer.get_analysis_pl()
+    if main:
+        print(trades)
+    expected = analyzer.get_analysis()
+    assert trades.columns == list(expected.columns)
+    assert trades['exe_date'].to_list() == expected['exe_date'].tolist()
+
+    # no trade records, same schema
+    empty = runtrades(strategy=bt.Strategy)[0].analyzers.ta.get_analysis_pl()
+    assert empty.is_empty()
+    assert empty.schema == trades.schema
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_exactbars(main=True)
+    test_optreturn(main=True)
+    test_nan(main=True)
+    test_polars(main=True)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+
+import pandas as pd
+
+import testcommon
+
+import backtrader as bt
+from backtrader.feeds_store import CloseOnlyDatafeed
+
+datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                        testcommon.datafiles[0])
+NOCOLS = dict(open=None, high=None, low=None, volume=None, openinterest=None)
+
+
+class RunStrategy(bt.Strategy):
+
+    def start(self):
+        self.bars = list()
+
+    def next(self):
+        self.bars.append(tuple(
+            (d.datetime[0], d.close[0], d.open[0]) for d in self.datas))
+
+
+def runbars(datas, preload=True):
+    cerebro = bt.Cerebro(preload=preload)
+    for data in datas:
+        cerebro.adddata(data)
+    cerebro.addstrategy(RunStrategy)
+    return cerebro.run()[0].bars
+
+
+def check(closeonly, pandasdata, main=False):
+    for preload in [True, False]:
+        bars = runbars([closeonly, pandasdata], preload=preload)
+        assert len(bars) == len(closeonly.p.dataname)
+        for bar, chkbar in bars:
+            if main:
+                print(bar, chkbar)
+            # unmapped lines are NaN in both feeds
+            assert str(bar) == str(chkbar)
+
+
+def test_run(main=False):
+    df = pd.read_csv(datapath, index_col=0, parse_dates=True)
+
+    # datetime index, close column only
+    check(CloseOnlyDatafeed(dataname=df[['Close']]),
+          bt.feeds.PandasData(dataname=df[['Close']], **NOCOLS), main)
+
+    # datetime column, other columns present but not mapped
+    dfcol = df.reset_index()
+    check(CloseOnlyDatafeed(dataname=dfcol, datetime=0),
+          bt.feeds.PandasData(dataname=dfcol, datetime=0, **NOCOLS), main)
+
+    # other columns mapped by the user, generic PandasData loading
+    check(CloseOnlyDatafeed(dataname=df, open=-1),
+          bt.feeds.PandasData(dataname=df, **dict(NOCOLS, open=-1)), main)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
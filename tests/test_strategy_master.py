@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import logging
+import os.path
+
+import pandas as pd
+
+import testcommon
+
+import backtrader as bt
+from backtrader.strategy_store import StrategyMaster
+
+
+class RecordHandler(logging.Handler):
+
+    def __init__(self):
+        super(RecordHandler, self).__init__()
+        self.records = list()
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class LogStrategy(StrategyMaster):
+
+    def __init__(self):
+        # backtrader strategies usually skip the call to super().__init__()
+        self.sma = bt.indicators.SMA(self.data, period=5)
+
+    def next(self):
+        if len(self) == self.sma.p.period:  # 1st next() call
+            self.log('info message', level='info')
+            self.log('debug message')
+            # look back longer than the data, logs a warning
+            self.getPortfolioRealizedVol(20)
+        if len(self) == 10:
+            self.buy(size=1)
+
+
+class OpenStrategy(StrategyMaster):
+
+    def __init__(self):
+        # no call to super().__init__(), as in LogStrategy
+        self.sma = bt.indicators.SMA(self.data, period=5)
+
+    def start(self):
+        self.opens = list()
+
+    def next(self):
+        size = self.getposition(self.data).size
+        chk = {'d0': ('d0', size, self.data.close[0])} if size else dict()
+        opens = {k: (v.ticker, v.size, v.price)
+                 for k, v in self.getOpenPosition().items()}
+        self.opens.append((opens, chk))
+
+        if len(self) % 20 == 0:
+            self.buy(size=1)
+        elif len(self) % 20 == 10:
+            self.close()
+
+
+def runlog(level, main=False):
+    handler = RecordHandler()
+    root = logging.getLogger()
+    oldlevel = root.level
+    root.addHandler(handler)
+    root.setLevel(level)
+    try:
+        cerebro = bt.Cerebro()
+        cerebro.adddata(testcommon.getdata(0), name='d0')
+        cerebro.addstrategy(LogStrategy)
+        cerebro.run()
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(oldlevel)
+
+    messages = [r.getMessage() for r in handler.records]
+    if main:
+        print(messages)
+    return messages
+
+
+def test_log(main=False):
+    messages = runlog(logging.DEBUG, main)
+    assert any(m.endswith(': info message') for m in messages)
+    assert any(m.endswith(': debug message') for m in messages)
+    assert any('getPortfolioRealizedVol()' in m for m in messages)
+    # notify_order() messages of the buy order
+    assert any('notify_order()' in m for m in messages)
+    assert any('BUY Completed' in m for m in messages)
+
+    messages = runlog(logging.WARNING, main)
+    assert len(messages) == 1
+    assert 'getPortfolioRealizedVol()' in messages[0]
+
+
+def test_open_position(main=False):
+    # getOpenPosition() validates the field against the pandas column mapping
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    df = pd.read_csv(datapath, index_col=0, parse_dates=True)
+    cerebro = bt.Cerebro()
+    cerebro.adddata(bt.feeds.PandasData(dataname=df), name='d0')
+    cerebro.addstrategy(OpenStrategy)
+    strat = cerebro.run()[0]
+
+    assert any(opens for opens, chk in strat.opens)
+    for opens, chk in strat.opens:
+        if main:
+            print(opens, chk)
+        assert opens == chk
+
+
+if __name__ == '__main__':
+    test_log(main=True)
+    test_open_position(main=True)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+
+import pandas as pd
+
+import testcommon
+
+import backtrader as bt
+from backtrader.analyzer_store import PerformanceAnalyzer, TradeAnalyzer
+from backtrader.strategy_store import run_parallel
+from backtrader.strategy_store.parallel import merge_performance, merge_trades
+
+datafiles = {
+    'ORCL': 'orcl-2003-2005.txt',
+    'YHOO': 'yhoo-2003-2005.txt',
+}
+CASH = 10000.0
+
+
+class RunStrategy(bt.Strategy):
+
+    def next(self):
+        for data in self.datas:
+            if len(self) % 17 == 0:
+                self.buy(data, size=3)
+            if len(self) % 29 == 0:
+                self.close(data)
+
+
+def run_single(names):
+    cerebro = bt.Cerebro(tradehistory=True)
+    for name in names:
+        datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                                datafiles[name])
+        df = pd.read_csv(datapath, index_col=0, parse_dates=True)
+        cerebro.adddata(bt.feeds.PandasData(dataname=df), name=name)
+    cerebro.broker.set_coc(True)
+    cerebro.broker.setcash(CASH * len(names))
+    cerebro.addstrategy(RunStrategy)
+    cerebro.addanalyzer(TradeAnalyzer, _name='ta')
+    cerebro.addanalyzer(PerformanceAnalyzer, _name='pa')
+    strat = cerebro.run()[0]
+    return dict(trades=strat.analyzers.ta.get_analysis(),
+                performance=strat.analyzers.pa.get_analysis())
+
+
+def check_merged(merged, expected):
+    for key, frame in expected['performance'].items():
+        pd.testing.assert_frame_equal(merged['performance'][key], frame)
+
+    # ref_id is only unique within a backtest, pnl% is relative to the
+    # value of the backtest portfolio
+    cols = ['ref_id', 'pnl%']
+    pd.testing.assert_frame_equal(merged['trades'].drop(columns=cols),
+                                  expected['trades'].drop(columns=cols))
+
+
+def test_merge(main=False):
+    expected = run_single(list(datafiles))
+    shards = [run_single([name]) for name in datafiles]
+    merged = dict(
+        trades=merge_trades([s['trades'] for s in shards]),
+        performance=merge_performance([s['performance'] for s in shards]),
+    )
+    if main:
+        print(merged['performance']['performance'])
+    check_merged(merged, expected)
+
+
+def test_run_parallel(main=False):
+    expected = run_single(list(datafiles))
+    merged = run_parallel(run_single, [[name] for name in datafiles],
+                          max_workers=2)
+    if main:
+        print(merged['trades'])
+    check_merged(merged, expected)
+
+
+def test_checks(main=False):
+    for merge in [merge_trades, merge_performance]:
+        try:
+            merge([])
+        except ValueError:
+            pass
+        else:
+            assert False, 'no input must raise ValueError'
+
+    # the same instrument in 2 backtests
+    shards = [run_single(['ORCL']), run_single(['ORCL', 'YHOO'])]
+    for key, merge in [('trades', merge_trades),
+                       ('performance', merge_performance)]:
+        try:
+            merge([s[key] for s in shards])
+        except ValueError as e:
+            if main:
+                print(e)
+            assert 'ORCL' in str(e)
+        else:
+            assert False, 'shared instruments must raise ValueError'
+
+
+if __name__ == '__main__':
+    test_merge(main=True)
+    test_run_parallel(main=True)
+    test_checks(main=True)
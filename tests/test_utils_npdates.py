@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+
+import numpy as np
+
+import testcommon
+
+import backtrader as bt
+from backtrader.utils.npdates import num2datetime64
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+NVALUES = 300000
+
+
+def getnums(seed=0):
+    rng = np.random.default_rng(seed)
+    first = datetime.date(1900, 1, 1).toordinal()
+    last = datetime.date(2100, 1, 1).toordinal()
+    days = rng.integers(first, last, NVALUES).astype(np.float64)
+    # random intraday times, whole seconds (bar timestamps) and the
+    # boundaries of the rounding compensation of num2date
+    fracs = np.concatenate([
+        rng.random(NVALUES // 3),
+        rng.integers(0, 86400, NVALUES // 3) / 86400.0,
+        rng.integers(0, 86400, NVALUES - 2 * (NVALUES // 3)) / 86400.0 +
+        rng.choice([-1e-11, 1e-11], NVALUES - 2 * (NVALUES // 3)),
+    ])
+    return np.clip(days + fracs, first, None)
+
+
+def check(nums, tz=None, main=False):
+    res = num2datetime64(nums, tz=tz)
+    assert res.dtype == np.dtype('datetime64[us]')
+    chk = np.array([bt.num2date(x, tz=tz) for x in nums.tolist()],
+                   dtype='datetime64[us]')
+    if main:
+        print(res[:5], chk[:5])
+    assert np.array_equal(res, chk)
+
+
+def test_run(main=False):
+    check(getnums(), main=main)
+
+
+def test_tz(main=False):
+    if ZoneInfo is None:
+        return  # zoneinfo is python >= 3.9
+
+    for tzname in ['America/New_York', 'Asia/Tokyo']:
+        check(getnums(1)[:NVALUES // 10], tz=ZoneInfo(tzname), main=main)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_tz(main=True)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+
+import testcommon
+
+import backtrader as bt
+from backtrader.utils.nplines import line_window
+
+SIZE = 5
+
+
+class RunStrategy(bt.Strategy):
+
+    def start(self):
+        self.windows = list()
+
+    def getlines(self):
+        return [self.data.close, self.stats.broker.value]
+
+    def next(self):
+        # the observers are updated after next(), one bar behind the data
+        if len(self) < SIZE + 2:
+            return
+        # the windows are held across bars, while the lines keep growing
+        for line in self.getlines():
+            for ago in (0, -1):
+                window = line_window(line, SIZE, ago=ago)
+                chk = line.get(ago=ago, size=SIZE)
+                self.windows.append((window, np.array(chk)))
+
+
+class BoundedStrategy(RunStrategy):
+
+    def __init__(self):
+        # with exactbars=1 the lines only keep the bars required by the
+        # indicators, enough for the windows
+        self.sma = bt.indicators.SMA(self.data, period=2 * SIZE)
+
+    def getlines(self):
+        # the observers keep a single bar
+        return [self.data.close, self.sma.lines.sma]
+
+
+def check(cerebros, main=False):
+    for cerebro in cerebros:
+        strat = cerebro.runstrats[0][0]
+        assert strat.windows
+        for window, chk in strat.windows:
+            if main:
+                print(window, chk)
+            assert window.dtype == np.float64
+            assert len(window) == SIZE
+            assert np.array_equal(window, chk, equal_nan=True)
+
+
+def test_run(main=False):
+    data = testcommon.getdata(0)
+    check(testcommon.runtest(data, RunStrategy), main)
+
+
+def test_exactbars(main=False):
+    # memory bounded lines, the windows are copied out of the deque
+    data = testcommon.getdata(0)
+    cerebros = testcommon.runtest(data, BoundedStrategy, exbar=1)
+    for cerebro in cerebros:
+        strat = cerebro.runstrats[0][0]
+        assert strat.data.close.mode == strat.data.close.QBuffer
+    check(cerebros, main)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_exactbars(main=True)